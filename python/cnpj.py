@@ -4,26 +4,67 @@ Código de exemplo para uso da API de CNPJ.
 Este script demonstra como fazer requisições ao endpoint da API de CNPJ.
 """
 
+import sys
+import threading
+import time
+from functools import lru_cache
+from urllib.parse import quote
+
 import requests
 
+from sessao import close_session, decode_json, get_headers, get_session
+
+# Mensagens de erro para os códigos HTTP tratados pela API
+_ERR_MAP = {
+    404: "CNPJ não encontrado",
+    403: "Erro de autenticação ou plano inativo",
+    400: "Requisição inválida",
+}
+
+
+@lru_cache(maxsize=1024)
+def _build_url(endpoint, cnpj):
+    """Monta a URL de consulta do CNPJ com a query string já codificada."""
+    return f"{endpoint}?cnpj={quote(str(cnpj), safe='')}"
+
 
 class CNPJAPI:
     """Classe para manipular requisições da API de CNPJ."""
 
-    def __init__(self, api_token, base_url="https://consultar.io/api/v1"):
+    def __init__(
+        self,
+        api_token,
+        base_url="https://consultar.io/api/v1",
+        timeout=10,
+        cache_ttl=86400,
+        cache_maxsize=1024,
+    ):
         """
         Inicializa o cliente da API de CNPJ.
 
         Args:
             api_token: Seu token de API para autenticação
             base_url: URL base da API
+            timeout: Tempo máximo de espera por resposta, em segundos
+            cache_ttl: Por quantos segundos reaproveitar o resultado de um CNPJ
+                já consultado (0 desativa o cache)
+            cache_maxsize: Número máximo de CNPJs mantidos no cache; ao
+                passar do limite, os mais antigos são descartados
         """
         self.api_token = api_token
         self.base_url = base_url
-        self.headers = {
-            "Authorization": f"Token {api_token}",
-            "Content-Type": "application/json",
-        }
+        self.headers = get_headers(api_token)
+        self.timeout = timeout
+        self._endpoint = f"{base_url}/cnpj/consultar"
+        self.cache_ttl = cache_ttl
+        self.cache_maxsize = cache_maxsize
+        # Dados cadastrais mudam pouco: guarda (expira_em, corpo da resposta)
+        # por CNPJ, em ordem de inserção
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+
+        # Reutiliza o pool de conexões compartilhado entre os clientes
+        self.session = get_session(base_url)
 
     def consultar(self, cnpj):
         """
@@ -33,28 +74,169 @@ class CNPJAPI:
             cnpj: Número do CNPJ (14 dígitos)
 
         Returns:
-            Dados da resposta da API
+            Dados da resposta da API, possivelmente vindos do cache
 
         Raises:
             requests.exceptions.RequestException: Se a requisição falhar
             ValueError: Se a resposta contiver um erro
         """
-        endpoint = f"{self.base_url}/cnpj/consultar"
-        params = {"cnpj": cnpj}
+        agora = time.monotonic()
+        em_cache = self._cache.get(cnpj)
+        if em_cache is not None and em_cache[0] > agora:
+            # Decodifica de novo para que o chamador receba sempre um dict novo
+            return decode_json(em_cache[1])
 
         try:
-            response = requests.get(endpoint, headers=self.headers, params=params)
+            response = self.session.get(
+                _build_url(self._endpoint, cnpj),
+                headers=self.headers,
+                timeout=self.timeout,
+            )
             response.raise_for_status()
-            return response.json()
         except requests.exceptions.HTTPError as e:
-            if response.status_code == 404:
-                raise ValueError("CNPJ não encontrado") from e
-            elif response.status_code == 403:
-                raise ValueError("Erro de autenticação ou plano inativo") from e
-            elif response.status_code == 400:
-                raise ValueError("Requisição inválida") from e
+            msg = _ERR_MAP.get(response.status_code)
+            if msg:
+                raise ValueError(msg) from e
             raise
 
+        conteudo = response.content
+        # Decodifica antes de guardar, para não manter respostas inválidas
+        resultado = decode_json(conteudo)
+        if self.cache_ttl and self.cache_maxsize:
+            self._guardar_no_cache(cnpj, conteudo)
+        return resultado
+
+    def _guardar_no_cache(self, cnpj, conteudo):
+        """
+        Guarda a resposta de um CNPJ no cache, respeitando o limite de tamanho.
+
+        Args:
+            cnpj: Número do CNPJ consultado
+            conteudo: Corpo da resposta da API
+        """
+        with self._cache_lock:
+            # A expiração é calculada dentro do lock para que a ordem de
+            # inserção seja também a ordem de expiração, mesmo com threads
+            agora = time.monotonic()
+            expira_em = agora + self.cache_ttl
+            # Reinsere no fim para manter o cache em ordem de expiração
+            self._cache.pop(cnpj, None)
+            self._cache[cnpj] = (expira_em, conteudo)
+
+            # Como o TTL é o mesmo para todas as entradas, as mais antigas
+            # são as primeiras a expirar
+            while self._cache:
+                mais_antigo = next(iter(self._cache))
+                if (
+                    len(self._cache) <= self.cache_maxsize
+                    and self._cache[mais_antigo][0] > agora
+                ):
+                    break
+                del self._cache[mais_antigo]
+
+    def consultar_many(self, cnpjs, max_workers=10):
+        """
+        Consulta vários CNPJs em paralelo, usando threads.
+
+        As threads compartilham a sessão do cliente; o pool de conexões da
+        sessão é seguro para uso concorrente.
+
+        Args:
+            cnpjs: Lista de números de CNPJ (14 dígitos)
+            max_workers: Número máximo de consultas simultâneas
+
+        Returns:
+            Lista com os dados de cada CNPJ, na mesma ordem da entrada
+
+        Raises:
+            requests.exceptions.RequestException: Se alguma requisição falhar
+            ValueError: Se alguma resposta contiver um erro
+        """
+        # Importado só aqui para não atrasar a inicialização do script
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.consultar, cnpjs))
+
+    async def consultar_many_async(self, cnpjs, concurrency=8):
+        """
+        Consulta vários CNPJs em paralelo.
+
+        As consultas compartilham a sessão do cliente e rodam em um pool de
+        threads próprio, com uma thread por consulta simultânea.
+
+        Args:
+            cnpjs: Lista de números de CNPJ (14 dígitos)
+            concurrency: Número máximo de consultas simultâneas
+
+        Returns:
+            Lista com os dados de cada CNPJ, na mesma ordem da entrada
+
+        Raises:
+            requests.exceptions.RequestException: Se alguma requisição falhar
+            ValueError: Se alguma resposta contiver um erro
+        """
+        # Importados só aqui para não atrasar a inicialização do script
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        futures = [executor.submit(self.consultar, cnpj) for cnpj in cnpjs]
+        try:
+            return await asyncio.gather(*map(asyncio.wrap_future, futures))
+        except BaseException:
+            # Em caso de erro ou cancelamento, descarta as consultas que ainda
+            # não começaram, para não fazer requisições cujo resultado se perde
+            for future in futures:
+                future.cancel()
+            raise
+        finally:
+            executor.shutdown(wait=False)
+
+
+# Modelos de texto usados por format_cnpj_info
+_TEMPLATE_BASICO = """
+Informações Básicas:
+CNPJ: {cnpj_formatado}
+Razão Social: {razao_social}
+Nome Fantasia: {nome_fantasia}
+Natureza Jurídica: {natureza_juridica_descricao}
+Capital Social: {capital_social_formatado}
+Porte: {porte_empresa_descricao}
+Matriz/Filial: {matriz_filial_descricao}
+Situação Cadastral: {situacao_cadastral_descricao}
+Data da Situação: {data_situacao_cadastral}
+Motivo da Situação: {motivo_situacao_cadastral_descricao}
+Data de Abertura: {data_inicio_atividades}
+
+Endereço:
+Tipo de Logradouro: {tipo_logradouro}
+Logradouro: {logradouro}
+Número: {numero}
+Complemento: {complemento}
+Bairro: {bairro}
+Cidade: {municipio_descricao}
+UF: {uf}
+CEP: {cep}
+
+Contato:"""
+
+_TEMPLATE_ATIVIDADE = """Email: {email}
+
+Atividade Principal:
+Código CNAE: {cnae_principal_codigo}
+Descrição CNAE: {cnae_principal_descricao}"""
+
+_TEMPLATE_CNAE = """Código: {codigo}
+Descrição: {descricao}"""
+
+_TEMPLATE_SOCIO = """
+Sócio: {nome_qsa}
+Tipo: {tipo_qsa_descricao}
+CPF/CNPJ: {cpf_cnpj_qsa_formatado}
+Qualificação: {qualificacao_qsa_descricao}
+Data de Entrada: {data_entrada_qsa}"""
+
 
 def format_cnpj_info(resultado):
     """
@@ -63,61 +245,32 @@ def format_cnpj_info(resultado):
     Args:
         resultado: Dados da resposta da API
     """
-    print("\nInformações Básicas:")
-    print(f"CNPJ: {resultado['cnpj_formatado']}")
-    print(f"Razão Social: {resultado['razao_social']}")
-    print(f"Nome Fantasia: {resultado['nome_fantasia']}")
-    print(f"Natureza Jurídica: {resultado['natureza_juridica_descricao']}")
-    print(f"Capital Social: {resultado['capital_social_formatado']}")
-    print(f"Porte: {resultado['porte_empresa_descricao']}")
-    print(f"Matriz/Filial: {resultado['matriz_filial_descricao']}")
-    print(f"Situação Cadastral: {resultado['situacao_cadastral_descricao']}")
-    print(f"Data da Situação: {resultado['data_situacao_cadastral']}")
-    print(f"Motivo da Situação: {resultado['motivo_situacao_cadastral_descricao']}")
-    print(f"Data de Abertura: {resultado['data_inicio_atividades']}")
-
-    print("\nEndereço:")
-    print(f"Tipo de Logradouro: {resultado['tipo_logradouro']}")
-    print(f"Logradouro: {resultado['logradouro']}")
-    print(f"Número: {resultado['numero']}")
-    print(f"Complemento: {resultado['complemento']}")
-    print(f"Bairro: {resultado['bairro']}")
-    print(f"Cidade: {resultado['municipio_descricao']}")
-    print(f"UF: {resultado['uf']}")
-    print(f"CEP: {resultado['cep']}")
-
-    print("\nContato:")
+    # Monta o texto completo e escreve de uma só vez no stdout
+    out = [_TEMPLATE_BASICO.format_map(resultado)]
     if resultado["ddd1"] and resultado["telefone1"]:
-        print(f"DDD: {resultado['ddd1']}")
-        print(f"Telefone: {resultado['telefone1']}")
+        out.append(f"DDD: {resultado['ddd1']}")
+        out.append(f"Telefone: {resultado['telefone1']}")
     if resultado["ddd2"] and resultado["telefone2"]:
-        print(f"DDD 2: {resultado['ddd2']}")
-        print(f"Telefone 2: {resultado['telefone2']}")
+        out.append(f"DDD 2: {resultado['ddd2']}")
+        out.append(f"Telefone 2: {resultado['telefone2']}")
     if resultado["ddd_fax"] and resultado["fax"]:
-        print(f"DDD Fax: {resultado['ddd_fax']}")
-        print(f"Fax: {resultado['fax']}")
-    print(f"Email: {resultado['email']}")
-
-    print("\nAtividade Principal:")
-    print(f"Código CNAE: {resultado['cnae_principal_codigo']}")
-    print(f"Descrição CNAE: {resultado['cnae_principal_descricao']}")
+        out.append(f"DDD Fax: {resultado['ddd_fax']}")
+        out.append(f"Fax: {resultado['fax']}")
+    out.append(_TEMPLATE_ATIVIDADE.format_map(resultado))
 
     if resultado["lista_cnae_secundarios"]:
-        print("\nAtividades Secundárias:")
+        out.append("\nAtividades Secundárias:")
         for cnae in resultado["lista_cnae_secundarios"]:
-            print(f"Código: {cnae['codigo']}")
-            print(f"Descrição: {cnae['descricao']}")
+            out.append(_TEMPLATE_CNAE.format_map(cnae))
 
     if resultado["lista_qsa"]:
-        print("\nQuadro Societário:")
+        out.append("\nQuadro Societário:")
         for socio in resultado["lista_qsa"]:
-            print(f"\nSócio: {socio['nome_qsa']}")
-            print(f"Tipo: {socio['tipo_qsa_descricao']}")
-            print(f"CPF/CNPJ: {socio['cpf_cnpj_qsa_formatado']}")
-            print(f"Qualificação: {socio['qualificacao_qsa_descricao']}")
-            print(f"Data de Entrada: {socio['data_entrada_qsa']}")
+            out.append(_TEMPLATE_SOCIO.format_map(socio))
             if socio["faixa_etaria_qsa_descricao"]:
-                print(f"Faixa Etária: {socio['faixa_etaria_qsa_descricao']}")
+                out.append(f"Faixa Etária: {socio['faixa_etaria_qsa_descricao']}")
+
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 def main():
@@ -125,12 +278,12 @@ def main():
     # Substitua pelo seu token de API real
     API_TOKEN = "seu-token-aqui"
 
-    # Inicializa o cliente da API
-    cnpj_api = CNPJAPI(API_TOKEN)
-
     # CNPJ de exemplo
     cnpj = "42515236000100"
 
+    # Inicializa o cliente da API
+    cnpj_api = CNPJAPI(API_TOKEN)
+
     try:
         # Faz a requisição à API
         resultado = cnpj_api.consultar(cnpj)
@@ -142,6 +295,9 @@ def main():
         print(f"Erro: {str(e)}")
     except requests.exceptions.RequestException as e:
         print(f"Erro na requisição: {str(e)}")
+    finally:
+        # Libera as conexões da sessão compartilhada
+        close_session()
 
 
 if __name__ == "__main__":
@@ -6,24 +6,36 @@ Este script demonstra como fazer requisições ao endpoint da API de CPF.
 
 import requests
 
+from sessao import close_session, decode_json, get_headers, get_session
+
+# Mensagens de erro para os códigos HTTP tratados pela API
+_ERR_MAP = {
+    404: "CPF não encontrado",
+    403: "Erro de autenticação ou plano inativo",
+    400: "Requisição inválida",
+}
+
 
 class CPFAPI:
     """Classe para manipular requisições da API de CPF."""
 
-    def __init__(self, api_token, base_url="https://consultar.io/api/v1"):
+    def __init__(self, api_token, base_url="https://consultar.io/api/v1", timeout=10):
         """
         Inicializa o cliente da API de CPF.
 
         Args:
             api_token: Seu token de API para autenticação
             base_url: URL base da API
+            timeout: Tempo máximo de espera por resposta, em segundos
         """
         self.api_token = api_token
         self.base_url = base_url
-        self.headers = {
-            "Authorization": f"Token {api_token}",
-            "Content-Type": "application/json",
-        }
+        self.headers = get_headers(api_token)
+        self.timeout = timeout
+        self._endpoint = f"{base_url}/cpf/consultar"
+
+        # Reutiliza o pool de conexões compartilhado entre os clientes
+        self.session = get_session(base_url)
 
     def consultar(self, cpf, data_nascimento):
         """
@@ -40,35 +52,103 @@ class CPFAPI:
             requests.exceptions.RequestException: Se a requisição falhar
             ValueError: Se a resposta contiver um erro
         """
-        endpoint = f"{self.base_url}/cpf/consultar"
         params = {"cpf": cpf, "data_nascimento": data_nascimento}
 
         try:
-            response = requests.get(endpoint, headers=self.headers, params=params)
+            response = self.session.get(
+                self._endpoint,
+                headers=self.headers,
+                params=params,
+                timeout=self.timeout,
+            )
             response.raise_for_status()
-            return response.json()
+            return decode_json(response.content)
         except requests.exceptions.HTTPError as e:
-            if response.status_code == 404:
-                raise ValueError("CPF não encontrado") from e
-            elif response.status_code == 403:
-                raise ValueError("Erro de autenticação ou plano inativo") from e
-            elif response.status_code == 400:
-                raise ValueError("Requisição inválida") from e
+            msg = _ERR_MAP.get(response.status_code)
+            if msg:
+                raise ValueError(msg) from e
             raise
 
+    def consultar_many(self, consultas, max_workers=10):
+        """
+        Consulta vários CPFs em paralelo, usando threads.
+
+        As threads compartilham a sessão do cliente; o pool de conexões da
+        sessão é seguro para uso concorrente.
+
+        Args:
+            consultas: Lista de pares (cpf, data_nascimento)
+            max_workers: Número máximo de consultas simultâneas
+
+        Returns:
+            Lista com os dados de cada CPF, na mesma ordem da entrada
+
+        Raises:
+            requests.exceptions.RequestException: Se alguma requisição falhar
+            ValueError: Se alguma resposta contiver um erro
+        """
+        # Importado só aqui para não atrasar a inicialização do script
+        from concurrent.futures import ThreadPoolExecutor
+
+        consultas = list(consultas)
+        if not consultas:
+            return []
+        cpfs, datas = zip(*consultas)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.consultar, cpfs, datas))
+
+    async def consultar_many_async(self, consultas, concurrency=8):
+        """
+        Consulta vários CPFs em paralelo.
+
+        As consultas compartilham a sessão do cliente e rodam em um pool de
+        threads próprio, com uma thread por consulta simultânea.
+
+        Args:
+            consultas: Lista de pares (cpf, data_nascimento)
+            concurrency: Número máximo de consultas simultâneas
+
+        Returns:
+            Lista com os dados de cada CPF, na mesma ordem da entrada
+
+        Raises:
+            requests.exceptions.RequestException: Se alguma requisição falhar
+            ValueError: Se alguma resposta contiver um erro
+        """
+        # Importados só aqui para não atrasar a inicialização do script
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        futures = [
+            executor.submit(self.consultar, cpf, data_nascimento)
+            for cpf, data_nascimento in consultas
+        ]
+        try:
+            return await asyncio.gather(*map(asyncio.wrap_future, futures))
+        except BaseException:
+            # Em caso de erro ou cancelamento, descarta as consultas que ainda
+            # não começaram, para não fazer requisições cujo resultado se perde
+            for future in futures:
+                future.cancel()
+            raise
+        finally:
+            executor.shutdown(wait=False)
+
 
 def main():
     """Exemplo de uso da API de CPF."""
     # Substitua pelo seu token de API real
     API_TOKEN = "seu-token-aqui"
 
-    # Inicializa o cliente da API
-    cpf_api = CPFAPI(API_TOKEN)
-
     # CPF e data de nascimento de exemplo
     cpf = "87135740009"
     data_nascimento = "1990-01-01"
 
+    # Inicializa o cliente da API
+    cpf_api = CPFAPI(API_TOKEN)
+
     try:
         # Faz a requisição à API
         resultado = cpf_api.consultar(cpf, data_nascimento)
@@ -90,6 +170,9 @@ def main():
         print(f"Erro: {str(e)}")
     except requests.exceptions.RequestException as e:
         print(f"Erro na requisição: {str(e)}")
+    finally:
+        # Libera as conexões da sessão compartilhada
+        close_session()
 
 
 if __name__ == "__main__":
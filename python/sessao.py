@@ -0,0 +1,148 @@
+"""
+Sessão HTTP compartilhada pelos clientes da API do Consultar.IO.
+Os clientes de CNPJ e CPF usam o mesmo pool de conexões para cada host da API.
+"""
+
+import http.cookiejar
+import json
+import threading
+from functools import lru_cache
+from types import MappingProxyType
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    # orjson é opcional e decodifica as respostas mais rápido que o json padrão
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+# Sessões compartilhadas, uma por origem (esquema + host + porta) da API
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _origin(base_url):
+    """Retorna a origem da URL, com a barra final, para montar o adaptador."""
+    parts = urlsplit(base_url)
+    return f"{parts.scheme}://{parts.netloc}/"
+
+
+def _create_session(origin):
+    """
+    Cria uma sessão HTTP com repetição de erros e pool para a origem.
+
+    Args:
+        origin: Origem da API, no formato devolvido por _origin
+
+    Returns:
+        requests.Session configurada para a origem
+    """
+    session = requests.Session()
+    # Sessão é compartilhada entre clientes com tokens diferentes: não guarda
+    # cookies, para que um cliente não envie os cookies recebidos por outro
+    session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+
+    # Repete GETs que falharem por erro transitório sem descartar a conexão
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        raise_on_status=False,
+    )
+    # Com pool_block, consultas simultâneas aguardam uma conexão livre do
+    # pool em vez de abrir conexões extras que seriam descartadas
+    session.mount(
+        origin,
+        HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            max_retries=retry,
+            pool_block=True,
+        ),
+    )
+    return session
+
+
+def get_session(base_url):
+    """
+    Retorna a sessão HTTP compartilhada da origem de base_url.
+
+    Clientes com a mesma origem, como os de CNPJ e CPF com a URL padrão,
+    usam a mesma sessão. A sessão não carrega o token de API nem guarda
+    cookies; cada cliente envia o seu cabeçalho de autenticação a cada
+    requisição.
+
+    Args:
+        base_url: URL base da API usada pelo cliente
+
+    Returns:
+        requests.Session configurada para a origem da URL
+    """
+    origin = _origin(base_url)
+    with _sessions_lock:
+        session = _sessions.get(origin)
+        if session is None:
+            session = _sessions[origin] = _create_session(origin)
+    return session
+
+
+def close_session():
+    """
+    Encerra todas as sessões compartilhadas e libera as conexões abertas.
+
+    Deve ser chamada quando nenhum cliente for mais usado; uma chamada
+    posterior a get_session cria uma sessão nova.
+    """
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
+
+@lru_cache(maxsize=32)
+def get_headers(api_token):
+    """
+    Retorna os cabeçalhos de autenticação para o token informado.
+
+    O mapeamento é somente leitura e reaproveitado entre clientes criados
+    com o mesmo token.
+
+    Args:
+        api_token: Seu token de API para autenticação
+
+    Returns:
+        Mapeamento com os cabeçalhos enviados em cada requisição
+    """
+    # O token já vai codificado, evitando a conversão a cada requisição
+    return MappingProxyType(
+        {
+            "Authorization": f"Token {api_token}".encode("latin-1"),
+            "Content-Type": "application/json",
+        }
+    )
+
+
+def decode_json(conteudo):
+    """
+    Decodifica o corpo JSON de uma resposta da API.
+
+    Args:
+        conteudo: Corpo da resposta, em bytes
+
+    Returns:
+        Dados decodificados
+
+    Raises:
+        requests.exceptions.JSONDecodeError: Se o corpo não for um JSON válido
+    """
+    try:
+        return json_loads(conteudo)
+    except json.JSONDecodeError as e:
+        # Mantém o mesmo erro de response.json(), que também é RequestException
+        raise requests.exceptions.JSONDecodeError(e.msg, e.doc, e.pos) from e